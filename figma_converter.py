@@ -12,14 +12,41 @@ This enhanced version includes better handling of:
 
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import ijson
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from typing import Dict, List, Any, Optional
-import re
+from figma_emit import FigmaEmitter, css_block, draws_nothing
+from typing import Dict, List, Any, Optional, Callable, TextIO
 
 # Load environment variables
 load_dotenv()
 
+# Uncompressed responses smaller than this are parsed in one go; larger or
+# compressed ones are streamed
+STREAM_THRESHOLD_BYTES = 1024 * 1024
+
+# Write buffer for each output file
+OUTPUT_BUFFER_BYTES = 1024 * 1024
+
+# Documents with fewer nodes than this are converted in a single process
+PARALLEL_MIN_NODES = 20000
+
+def _count_nodes(root: Dict[str, Any]) -> int:
+    """Count the nodes in a subtree"""
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        children = node.get('children')
+        if children:
+            stack.extend(children)
+    return count
+
 class EnhancedFigmaConverter:
     def __init__(self):
         self.access_token = os.getenv('FIGMA_ACCESS_TOKEN')
@@ -28,282 +55,129 @@ class EnhancedFigmaConverter:
         self.headers = {
             'X-Figma-Token': self.access_token
         }
+        self.emitter = FigmaEmitter()
         
         if not self.access_token:
             raise ValueError("FIGMA_ACCESS_TOKEN not found in environment variables")
+        
+        # One pooled session so repeated API calls reuse the TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
     
-    def fetch_figma_file(self) -> Dict[str, Any]:
-        """Fetch the Figma file data from the API"""
-        url = f"{self.base_url}/files/{self.file_key}"
+    def fetch_figma_file(self, file_key: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch the Figma file data from the API, defaulting to FIGMA_FILE_KEY
+
+        Uncompressed responses whose Content-Length is under
+        STREAM_THRESHOLD_BYTES are read whole and decoded with orjson. All
+        others, including compressed ones whose decoded size is unknown, are
+        parsed incrementally from the socket with ijson so the raw body is
+        never held in memory. Either way only the document tree is returned,
+        as {'document': ...}.
+        """
+        url = f"{self.base_url}/files/{file_key or self.file_key}"
         
         try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            with self.session.get(url, stream=True) as response:
+                response.raise_for_status()
+                
+                # Content-Length is the wire size, so it only bounds the decoded
+                # body when the response is not compressed
+                content_length = int(response.headers.get('Content-Length') or 0)
+                encoding = response.headers.get('Content-Encoding', 'identity')
+                if encoding == 'identity' and 0 < content_length < STREAM_THRESHOLD_BYTES:
+                    return {'document': orjson.loads(response.content).get('document', {})}
+                
+                response.raw.decode_content = True
+                document = next(ijson.items(response.raw, 'document', use_float=True), {})
+                return {'document': document}
         except requests.exceptions.RequestException as e:
             print(f"Error fetching Figma file: {e}")
             raise
     
+    @property
+    def skipped_nodes(self) -> int:
+        """Hidden or empty nodes pruned by the last conversion"""
+        return self.emitter.skipped_nodes
+    
     def convert_color(self, color: Dict[str, float]) -> str:
         """Convert Figma color to CSS color"""
-        if not color:
-            return 'transparent'
-        
-        r = int(color.get('r', 0) * 255)
-        g = int(color.get('g', 0) * 255)
-        b = int(color.get('b', 0) * 255)
-        a = color.get('a', 1)
-        
-        if a < 1:
-            return f"rgba({r}, {g}, {b}, {a})"
-        else:
-            return f"rgb({r}, {g}, {b})"
+        return self.emitter.convert_color(color)
     
     def convert_fill(self, fills: List[Dict[str, Any]]) -> str:
         """Convert Figma fills to CSS background"""
-        if not fills:
-            return 'transparent'
-        
-        fill = fills[0]  # Take the first fill
-        
-        if fill.get('type') == 'SOLID':
-            return self.convert_color(fill.get('color', {}))
-        elif fill.get('type') == 'GRADIENT_LINEAR':
-            # Handle linear gradients
-            gradient_stops = []
-            for stop in fill.get('gradientStops', []):
-                color = self.convert_color(stop.get('color', {}))
-                position = int(stop.get('position', 0) * 100)
-                gradient_stops.append(f"{color} {position}%")
-            
-            return f"linear-gradient({gradient_stops[0] if gradient_stops else 'transparent'})"
-        
-        return 'transparent'
+        return self.emitter.convert_fill(fills)
     
-    def convert_text_style(self, style: Dict[str, Any]) -> Dict[str, str]:
-        """Convert Figma text style to CSS"""
-        css = {}
-        
-        # Font family
-        if 'fontFamily' in style:
-            css['font-family'] = f'"{style["fontFamily"]}", sans-serif'
-        
-        # Font size
-        if 'fontSize' in style:
-            css['font-size'] = f"{style['fontSize']}px"
-        
-        # Font weight
-        if 'fontWeight' in style:
-            css['font-weight'] = str(style['fontWeight'])
-        
-        # Line height
-        if 'lineHeightPx' in style:
-            css['line-height'] = f"{style['lineHeightPx']}px"
-        
-        # Letter spacing
-        if 'letterSpacing' in style:
-            css['letter-spacing'] = f"{style['letterSpacing']}px"
-        
-        # Text alignment
-        if 'textAlignHorizontal' in style:
-            align_map = {
-                'LEFT': 'left',
-                'CENTER': 'center',
-                'RIGHT': 'right',
-                'JUSTIFIED': 'justify'
-            }
-            css['text-align'] = align_map.get(style['textAlignHorizontal'], 'left')
-        
-        # Text decoration
-        if 'textDecoration' in style:
-            if style['textDecoration'] == 'UNDERLINE':
-                css['text-decoration'] = 'underline'
-            elif style['textDecoration'] == 'STRIKETHROUGH':
-                css['text-decoration'] = 'line-through'
-        
-        return css
+    def convert_text_style(self, style: Dict[str, Any], css: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Convert Figma text style to CSS, adding to css if one is given"""
+        return self.emitter.convert_text_style(style, css)
     
     def convert_layout(self, node: Dict[str, Any], parent_bbox: dict = None) -> Dict[str, str]:
         """Convert Figma layout properties to CSS, positioned relative to parent if present"""
-        css = {}
-        
-        # Position and dimensions
-        if 'absoluteBoundingBox' in node:
-            bbox = node['absoluteBoundingBox']
-            if parent_bbox:
-                rel_x = bbox['x'] - parent_bbox['x']
-                rel_y = bbox['y'] - parent_bbox['y']
-                css['position'] = 'absolute'
-                css['left'] = f"{rel_x}px"
-                css['top'] = f"{rel_y}px"
-            else:
-                css['position'] = 'absolute'
-                css['left'] = f"{bbox['x']}px"
-                css['top'] = f"{bbox['y']}px"
-            css['width'] = f"{bbox['width']}px"
-            css['height'] = f"{bbox['height']}px"
-        
-        # Auto layout properties
-        if 'layoutMode' in node:
-            if node['layoutMode'] == 'HORIZONTAL':
-                css['display'] = 'flex'
-                css['flex-direction'] = 'row'
-            elif node['layoutMode'] == 'VERTICAL':
-                css['display'] = 'flex'
-                css['flex-direction'] = 'column'
-            
-            # Primary axis alignment
-            if 'primaryAxisAlignItems' in node:
-                align_map = {
-                    'MIN': 'flex-start',
-                    'CENTER': 'center',
-                    'MAX': 'flex-end',
-                    'SPACE_BETWEEN': 'space-between',
-                    'SPACE_AROUND': 'space-around'
-                }
-                css['justify-content'] = align_map.get(node['primaryAxisAlignItems'], 'flex-start')
-            
-            # Counter axis alignment
-            if 'counterAxisAlignItems' in node:
-                align_map = {
-                    'MIN': 'flex-start',
-                    'CENTER': 'center',
-                    'MAX': 'flex-end',
-                    'BASELINE': 'baseline'
-                }
-                css['align-items'] = align_map.get(node['counterAxisAlignItems'], 'flex-start')
-        
-        # Padding
-        if 'paddingLeft' in node:
-            css['padding-left'] = f"{node['paddingLeft']}px"
-        if 'paddingRight' in node:
-            css['padding-right'] = f"{node['paddingRight']}px"
-        if 'paddingTop' in node:
-            css['padding-top'] = f"{node['paddingTop']}px"
-        if 'paddingBottom' in node:
-            css['padding-bottom'] = f"{node['paddingBottom']}px"
-        
-        # Gap
-        if 'itemSpacing' in node:
-            css['gap'] = f"{node['itemSpacing']}px"
-        
-        # Border radius
-        if 'cornerRadius' in node:
-            css['border-radius'] = f"{node['cornerRadius']}px"
-        
-        # Constraints (for responsive behavior)
-        if 'constraints' in node:
-            constraints = node['constraints']
-            if constraints.get('horizontal') == 'CENTER':
-                css['margin-left'] = 'auto'
-                css['margin-right'] = 'auto'
-            elif constraints.get('horizontal') == 'RIGHT':
-                css['margin-left'] = 'auto'
-        
-        return css
+        return self.emitter.convert_layout(node, parent_bbox)
     
-    def convert_node_to_html(self, node: Dict[str, Any], level: int = 0, parent_bbox=None) -> str:
-        """Convert a Figma node to HTML"""
-        indent = "  " * level
-        
-        # Determine HTML tag based on node type
-        tag_map = {
-            'FRAME': 'div',
-            'GROUP': 'div',
-            'RECTANGLE': 'div',
-            'ELLIPSE': 'div',
-            'TEXT': 'p',
-            'VECTOR': 'div',
-            'COMPONENT': 'div',
-            'INSTANCE': 'div',
-            'BOOLEAN_OPERATION': 'div',
-            'CANVAS': 'div'
-        }
-        
-        tag = tag_map.get(node.get('type', 'FRAME'), 'div')
-        
-        # Generate CSS class name with safe characters (no colons)
-        raw_id = node.get('id', 'unknown')
-        safe_id = re.sub(r"[^A-Za-z0-9_-]", "-", raw_id)
-        class_name = f"figma-{node.get('type', 'frame').lower()}-{safe_id}"
-        
-        # Handle text content
-        content = ""
-        if node.get('type') == 'TEXT' and 'characters' in node:
-            content = node['characters']
-        
-        # Handle children
-        children_html = ""
-        if 'children' in node:
-            this_bbox = node.get('absoluteBoundingBox')
-            # children get THIS node's bbox as parent_bbox
-            for child in node['children']:
-                children_html += self.convert_node_to_html(child, level + 1, parent_bbox=this_bbox)
-        
-        # Combine content and children
-        inner_content = content + children_html
-        
-        return f"{indent}<{tag} class=\"{class_name}\">{inner_content}</{tag}>\n"
+    def convert_node_to_style(self, node: Dict[str, Any], parent_bbox=None) -> Dict[str, str]:
+        """Convert a Figma node to CSS properties, collected in a single dict"""
+        return self.emitter.convert_node_to_style(node, parent_bbox)
+    
+    def _walk_pages_parallel(self, document: Dict[str, Any],
+                             write_html: Callable[[str], Any], write_css: Callable[[str], Any]):
+        """Walk each top-level page in its own process and merge the results
+        
+        Pages are merged in document order and their shared styles renumbered
+        against this converter's, so the output matches a single-process walk.
+        """
+        pages = document['children']
+        
+        # A shell of the document without children emits its opening and
+        # closing tags as separate parts; the pages go in between
+        emitter = self.emitter
+        shell_parts = []
+        emitter.walk({**document, 'children': []}, 2, None, shell_parts.append, write_css)
+        write_html(shell_parts[0])
+        
+        style_names = emitter.style_names
+        workers = min(len(pages), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_convert_page, pages, repeat(document.get('absoluteBoundingBox')))
+            for fragments, style_refs, page_styles, skipped in results:
+                renames = {}
+                for index, signature in enumerate(page_styles, 1):
+                    style_name = style_names.get(signature)
+                    if style_name is None:
+                        style_name = f"style-{len(style_names) + 1}"
+                        style_names[signature] = style_name
+                        write_css(css_block(style_name, dict(signature)))
+                    renames[f"style-{index}"] = style_name
+                
+                # Each style reference sits between two HTML fragments
+                write_html(fragments[0])
+                for local_name, fragment in zip(style_refs, fragments[1:]):
+                    write_html(renames[local_name])
+                    write_html(fragment)
+                emitter.skipped_nodes += skipped
+        
+        write_html(shell_parts[1])
     
     def convert_node_to_css(self, node: Dict[str, Any], parent_bbox=None) -> str:
-        """Convert a Figma node to CSS"""
-        raw_id = node.get('id', 'unknown')
-        safe_id = re.sub(r"[^A-Za-z0-9_-]", "-", raw_id)
-        class_name = f"figma-{node.get('type', 'frame').lower()}-{safe_id}"
-        css_rules = []
-
-        # Layout properties
-        layout_css = self.convert_layout(node, parent_bbox)
-        css_rules.extend([f"  {prop}: {value};" for prop, value in layout_css.items()])
-
-        # Fills for background or text color
-        if 'fills' in node:
-            fill = node['fills'][0] if node['fills'] else None
-            if node.get('type') == 'TEXT' and fill and fill.get('type') == 'SOLID':
-                color = self.convert_color(fill.get('color', {}))
-                css_rules.append(f"  color: {color};")
-                # Do NOT set background for text node
-            elif fill:
-                background = self.convert_fill(node['fills'])
-                if background != 'transparent':
-                    css_rules.append(f"  background: {background};")
-
-        # Text styling
-        if node.get('type') == 'TEXT' and 'style' in node:
-            text_css = self.convert_text_style(node['style'])
-            css_rules.extend([f"  {prop}: {value};" for prop, value in text_css.items()])
-
-        # Border
-        if 'strokes' in node and node['strokes']:
-            stroke = node['strokes'][0]
-            if stroke.get('type') == 'SOLID':
-                color = self.convert_color(stroke.get('color', {}))
-                stroke_weight = stroke.get('strokeWeight', 1)
-                css_rules.append(f"  border: {stroke_weight}px solid {color};")
-
-        # Effects (shadows, blurs, etc.)
-        if 'effects' in node:
-            for effect in node['effects']:
-                if effect.get('type') == 'DROP_SHADOW':
-                    offset_x = effect.get('offset', {}).get('x', 0)
-                    offset_y = effect.get('offset', {}).get('y', 0)
-                    blur_radius = effect.get('radius', 0)
-                    color = self.convert_color(effect.get('color', {}))
-                    css_rules.append(f"  box-shadow: {offset_x}px {offset_y}px {blur_radius}px {color};")
-
-        # Convert to CSS block
-        if css_rules:
-            css_block = f".{class_name} {{\n" + "\n".join(css_rules) + "\n}\n\n"
-            return css_block
+        """Convert a Figma node to a CSS block for its own class"""
+        css = self.emitter.convert_node_to_style(node, parent_bbox)
+        if css:
+            return css_block(self.emitter.class_name_for(node), css)
 
         return ""
     
-    def generate_html_css(self, figma_data: Dict[str, Any]) -> tuple[str, str]:
-        """Generate HTML and CSS from Figma data"""
+    def generate_html_css(self, figma_data: Dict[str, Any], html_fp: TextIO, css_fp: TextIO):
+        """Generate HTML and CSS from Figma data, writing them to html_fp and css_fp
+        
+        Both are written while the tree is walked, so neither document is held
+        in memory; the page links the stylesheet instead of inlining it.
+        """
         document = figma_data.get('document', {})
+        self.emitter.reset()
         
         # Start HTML
-        html = """<!DOCTYPE html>
+        html_fp.write("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -324,63 +198,88 @@ class EnhancedFigmaConverter:
             width: 100%;
             min-height: 100vh;
         }
-"""
-        
-        # Start CSS
-        css = ""
-        
-        # Process all nodes recursively
-        def process_node(node: Dict[str, Any], parent_bbox=None):
-            nonlocal css
-            css += self.convert_node_to_css(node, parent_bbox)
-            
-            if 'children' in node:
-                this_bbox = node.get('absoluteBoundingBox')
-                for child in node['children']:
-                    process_node(child, this_bbox)
-        
-        # Process document
-        process_node(document)
-        
-        # Add CSS to HTML
-        html += css
-        html += "    </style>\n</head>\n<body>\n"
-        html += '    <div class="figma-container">\n'
-        
-        # Add HTML content
-        html += self.convert_node_to_html(document, 2, parent_bbox=None)
-        
-        html += "    </div>\n</body>\n</html>"
+    </style>
+    <link rel="stylesheet" href="styles.css">
+</head>
+<body>
+    <div class="figma-container">
+""")
+        
+        # Emit HTML and CSS for all nodes in one walk, splitting large
+        # multi-page documents across worker processes
+        pages = document.get('children') or []
+        # The parallel path walks the root without its pages, so a root the
+        # serial walk could prune or keep only for its children stays serial
+        parallel = (len(pages) > 1 and (os.cpu_count() or 1) > 1
+                    and document.get('visible') is not False and not draws_nothing(document)
+                    and _count_nodes(document) >= PARALLEL_MIN_NODES)
+        if parallel:
+            self._walk_pages_parallel(document, html_fp.write, css_fp.write)
+        else:
+            self.emitter.walk(document, 2, None, html_fp.write, css_fp.write)
         
-        return html, css
+        html_fp.write("    </div>\n</body>\n</html>")
     
-    def save_output(self, html: str, css: str):
-        """Save HTML and CSS to files"""
-        os.makedirs('output', exist_ok=True)
-        
-        with open('output/index.html', 'w', encoding='utf-8') as f:
-            f.write(html)
+    def run(self, file_key: Optional[str] = None, output_dir: str = 'output'):
+        """Main execution method
         
-        with open('output/styles.css', 'w', encoding='utf-8') as f:
-            f.write(css)
-        
-        print("Files saved to output/ directory:")
-        print("- output/index.html")
-        print("- output/styles.css")
-    
-    def run(self):
-        """Main execution method"""
+        Batch conversions can call this repeatedly on one converter; the HTTP
+        session, color cache and emitter tables are reused between files.
+        """
         print("Fetching Figma file...")
-        figma_data = self.fetch_figma_file()
+        figma_data = self.fetch_figma_file(file_key)
         
         print("Converting to HTML/CSS...")
-        html, css = self.generate_html_css(figma_data)
+        os.makedirs(output_dir, exist_ok=True)
+        html_path = os.path.join(output_dir, 'index.html')
+        css_path = os.path.join(output_dir, 'styles.css')
+        
+        # Stream into temporary files and only replace the previous output
+        # once the whole document has converted
+        html_tmp = f"{html_path}.tmp"
+        css_tmp = f"{css_path}.tmp"
+        try:
+            with open(html_tmp, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_BYTES) as html_fp, \
+                    open(css_tmp, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_BYTES) as css_fp:
+                self.generate_html_css(figma_data, html_fp, css_fp)
+        except BaseException:
+            for path in (html_tmp, css_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+        os.replace(css_tmp, css_path)
+        os.replace(html_tmp, html_path)
         
-        print("Saving output files...")
-        self.save_output(html, css)
+        if self.skipped_nodes:
+            print(f"Skipped {self.skipped_nodes} hidden or empty nodes")
+        
+        print(f"Files saved to {output_dir}/ directory:")
+        print(f"- {html_path}")
+        print(f"- {css_path}")
         
         print("Conversion complete!")
 
+def _convert_page(page: Dict[str, Any], parent_bbox: Optional[dict]) -> tuple[list, list, list, int]:
+    """Convert one top-level page in a worker process
+    
+    Returns the page HTML as fragments split at each style class, the local
+    style-N name used at each split, the page's style signatures in style-N
+    order and the number of skipped nodes.
+    """
+    emitter = FigmaEmitter()
+    html_parts = []
+    fragments = []
+    style_refs = []
+    
+    def write_style(style_name: str):
+        fragments.append(''.join(html_parts))
+        html_parts.clear()
+        style_refs.append(style_name)
+    
+    emitter.walk(page, 3, parent_bbox, html_parts.append, None, write_style)
+    fragments.append(''.join(html_parts))
+    return fragments, style_refs, list(emitter.style_names), emitter.skipped_nodes
+
 def main():
     """Main function"""
     try:
@@ -0,0 +1,435 @@
+"""
+Node to HTML/CSS emission for the Figma converter
+
+The per-node conversion and the tree walk live in this module so they can
+be compiled ahead of time with mypyc (`mypyc figma_emit.py`). When the
+compiled extension is present next to this file Python imports it in
+place of the source; otherwise this pure Python module is used.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Characters that are not safe in a CSS class name
+_ID_RE = re.compile(r"[^A-Za-z0-9_-]")
+
+# Byte table mapping the same characters to '-', for ASCII ids
+_ID_TABLE = bytes(
+    c if chr(c).isascii() and (chr(c).isalnum() or chr(c) in '_-') else ord('-')
+    for c in range(256)
+)
+
+# HTML tag for each Figma node type
+_TAG_MAP = {
+    'FRAME': 'div',
+    'GROUP': 'div',
+    'RECTANGLE': 'div',
+    'ELLIPSE': 'div',
+    'TEXT': 'p',
+    'VECTOR': 'div',
+    'COMPONENT': 'div',
+    'INSTANCE': 'div',
+    'BOOLEAN_OPERATION': 'div',
+    'CANVAS': 'div'
+}
+
+# Auto layout alignment to flexbox values
+_PRIMARY_ALIGN = {
+    'MIN': 'flex-start',
+    'CENTER': 'center',
+    'MAX': 'flex-end',
+    'SPACE_BETWEEN': 'space-between',
+    'SPACE_AROUND': 'space-around'
+}
+
+_COUNTER_ALIGN = {
+    'MIN': 'flex-start',
+    'CENTER': 'center',
+    'MAX': 'flex-end',
+    'BASELINE': 'baseline'
+}
+
+# Horizontal text alignment
+_TEXT_ALIGN = {
+    'LEFT': 'left',
+    'CENTER': 'center',
+    'RIGHT': 'right',
+    'JUSTIFIED': 'justify'
+}
+
+def _px(value: float) -> str:
+    """Format a pixel length, dropping float noise beyond two decimals"""
+    if not value:
+        return "0px"
+    int_value = int(value)
+    if int_value == value:
+        return f"{int_value}px"
+    value = round(value, 2)
+    int_value = int(value)
+    if int_value == value:
+        return f"{int_value}px"
+    return f"{value}px"
+
+def css_block(class_name: str, css: Dict[str, str]) -> str:
+    """Render a dict of CSS properties as a rule block for a class"""
+    declarations = "\n".join(f"  {prop}: {value};" for prop, value in css.items())
+    return f".{class_name} {{\n{declarations}\n}}\n\n"
+
+def draws_nothing(node: Dict[str, Any]) -> bool:
+    """Whether a node is a zero-size box with no line, stroke or effect to render"""
+    bbox = node.get('absoluteBoundingBox')
+    return (bbox is not None and (not bbox['width'] or not bbox['height'])
+            and node.get('type', 'FRAME') != 'LINE'
+            and not node.get('strokes') and not node.get('effects'))
+
+class FigmaEmitter:
+    """Converts Figma nodes to CSS properties and emits HTML/CSS for a tree
+    
+    Holds the caches shared across one conversion; call reset() before
+    walking a new document.
+    """
+    
+    def __init__(self) -> None:
+        # Shared style class names by declaration list, per conversion
+        self.style_names: Dict[tuple, str] = {}
+        # CSS colors by (r, g, b, a); designs reuse a small palette
+        self._color_cache: Dict[tuple, str] = {}
+        # Hidden or empty nodes pruned since the last reset
+        self.skipped_nodes = 0
+    
+    def reset(self) -> None:
+        """Forget per-document state before converting a new document"""
+        self.style_names.clear()
+        self.skipped_nodes = 0
+    
+    def convert_color(self, color: Optional[Dict[str, Any]]) -> str:
+        """Convert Figma color to CSS color
+        
+        The hot paths in convert_fill and convert_node_to_style check
+        _color_cache inline and only call this on a miss.
+        """
+        if not color:
+            return 'transparent'
+        
+        key = (color['r'], color['g'], color['b'], color.get('a', 1))
+        css_color = self._color_cache.get(key)
+        if css_color is not None:
+            return css_color
+        
+        r = int(key[0] * 255 + 0.5)
+        g = int(key[1] * 255 + 0.5)
+        b = int(key[2] * 255 + 0.5)
+        a = key[3]
+        
+        if a < 1:
+            css_color = f"rgba({r}, {g}, {b}, {a})"
+        else:
+            css_color = f"rgb({r}, {g}, {b})"
+        self._color_cache[key] = css_color
+        return css_color
+    
+    def convert_fill(self, fills: List[Dict[str, Any]]) -> str:
+        """Convert Figma fills to CSS background"""
+        if not fills:
+            return 'transparent'
+        
+        fill = fills[0]  # Take the first fill
+        fill_type = fill.get('type')
+        convert_color = self.convert_color
+        color_cache = self._color_cache
+        
+        # Colors are looked up in the cache inline and only converted on a miss
+        if fill_type == 'SOLID':
+            c = fill.get('color')
+            color = c and color_cache.get((c['r'], c['g'], c['b'], c.get('a', 1)))
+            return color or convert_color(c)
+        elif fill_type == 'GRADIENT_LINEAR':
+            # Handle linear gradients
+            gradient_stops = []
+            for stop in fill.get('gradientStops', []):
+                c = stop.get('color')
+                color = c and color_cache.get((c['r'], c['g'], c['b'], c.get('a', 1)))
+                color = color or convert_color(c)
+                position = int(stop.get('position', 0) * 100)
+                gradient_stops.append(f"{color} {position}%")
+            
+            return f"linear-gradient({gradient_stops[0] if gradient_stops else 'transparent'})"
+        
+        return 'transparent'
+    
+    def convert_text_style(self, style: Dict[str, Any], css: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Convert Figma text style to CSS, adding to css if one is given"""
+        if css is None:
+            css = {}
+        
+        # Font family
+        if 'fontFamily' in style:
+            css['font-family'] = f'"{style["fontFamily"]}", sans-serif'
+        
+        # Font size
+        if 'fontSize' in style:
+            css['font-size'] = _px(style['fontSize'])
+        
+        # Font weight
+        if 'fontWeight' in style:
+            css['font-weight'] = str(style['fontWeight'])
+        
+        # Line height
+        if 'lineHeightPx' in style:
+            css['line-height'] = _px(style['lineHeightPx'])
+        
+        # Letter spacing
+        if 'letterSpacing' in style:
+            css['letter-spacing'] = _px(style['letterSpacing'])
+        
+        # Text alignment
+        if 'textAlignHorizontal' in style:
+            css['text-align'] = _TEXT_ALIGN.get(style['textAlignHorizontal'], 'left')
+        
+        # Text decoration
+        if 'textDecoration' in style:
+            if style['textDecoration'] == 'UNDERLINE':
+                css['text-decoration'] = 'underline'
+            elif style['textDecoration'] == 'STRIKETHROUGH':
+                css['text-decoration'] = 'line-through'
+        
+        return css
+    
+    def convert_layout(self, node: Dict[str, Any], parent_bbox: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Convert Figma layout properties to CSS, positioned relative to parent if present"""
+        css = {}
+        get = node.get
+        
+        # Position and dimensions
+        bbox = get('absoluteBoundingBox')
+        if bbox is not None:
+            if parent_bbox:
+                x = bbox['x']
+                y = bbox['y']
+                parent_x = parent_bbox['x']
+                parent_y = parent_bbox['y']
+                css['position'] = 'absolute'
+                if x == parent_x and y == parent_y:
+                    # Same origin as the parent, common for full-bleed frames
+                    css['left'] = '0px'
+                    css['top'] = '0px'
+                else:
+                    css['left'] = _px(x - parent_x)
+                    css['top'] = _px(y - parent_y)
+            else:
+                css['position'] = 'absolute'
+                css['left'] = _px(bbox['x'])
+                css['top'] = _px(bbox['y'])
+            css['width'] = _px(bbox['width'])
+            css['height'] = _px(bbox['height'])
+        
+        # Auto layout properties
+        layout_mode = get('layoutMode')
+        if layout_mode is not None:
+            if layout_mode == 'HORIZONTAL':
+                css['display'] = 'flex'
+                css['flex-direction'] = 'row'
+            elif layout_mode == 'VERTICAL':
+                css['display'] = 'flex'
+                css['flex-direction'] = 'column'
+            
+            # Primary axis alignment
+            primary_align = get('primaryAxisAlignItems')
+            if primary_align is not None:
+                css['justify-content'] = _PRIMARY_ALIGN.get(primary_align, 'flex-start')
+            
+            # Counter axis alignment
+            counter_align = get('counterAxisAlignItems')
+            if counter_align is not None:
+                css['align-items'] = _COUNTER_ALIGN.get(counter_align, 'flex-start')
+        
+        # Padding, using the shorthand when all four sides are set
+        pad_left: Any = get('paddingLeft')
+        pad_right: Any = get('paddingRight')
+        pad_top: Any = get('paddingTop')
+        pad_bottom: Any = get('paddingBottom')
+        if None not in (pad_left, pad_right, pad_top, pad_bottom):
+            if pad_left == pad_right == pad_top == pad_bottom:
+                css['padding'] = _px(pad_top)
+            else:
+                css['padding'] = f"{_px(pad_top)} {_px(pad_right)} {_px(pad_bottom)} {_px(pad_left)}"
+        else:
+            if pad_left is not None:
+                css['padding-left'] = _px(pad_left)
+            if pad_right is not None:
+                css['padding-right'] = _px(pad_right)
+            if pad_top is not None:
+                css['padding-top'] = _px(pad_top)
+            if pad_bottom is not None:
+                css['padding-bottom'] = _px(pad_bottom)
+        
+        # Gap
+        value = get('itemSpacing')
+        if value is not None:
+            css['gap'] = _px(value)
+        
+        # Border radius
+        value = get('cornerRadius')
+        if value is not None:
+            css['border-radius'] = _px(value)
+        
+        # Constraints (for responsive behavior)
+        constraints = get('constraints')
+        if constraints is not None:
+            horizontal = constraints.get('horizontal')
+            if horizontal == 'CENTER':
+                css['margin'] = '0 auto'
+            elif horizontal == 'RIGHT':
+                css['margin-left'] = 'auto'
+        
+        return css
+    
+    def class_name_for(self, node: Dict[str, Any]) -> str:
+        """Return the CSS class name for a node"""
+        # Generate CSS class name with safe characters (no colons)
+        raw_id = node.get('id', 'unknown')
+        if raw_id.isascii():
+            safe_id = raw_id.encode('ascii').translate(_ID_TABLE).decode('ascii')
+        else:
+            safe_id = _ID_RE.sub('-', raw_id)
+        return f"figma-{node.get('type', 'frame').lower()}-{safe_id}"
+    
+    def walk(self, root: Dict[str, Any], level: int, parent_bbox: Optional[Dict[str, Any]],
+             write_html: Callable[[str], Any], write_css: Optional[Callable[[str], Any]],
+             write_style: Optional[Callable[[str], Any]] = None) -> None:
+        """Emit the HTML and CSS for a node and its subtree in a single pass
+        
+        The tree is walked with an explicit stack of (node, level, parent_bbox,
+        phase) entries so deeply nested designs neither pay Python call
+        overhead per node nor hit the recursion limit. Output is handed to
+        write_html and write_css as it is produced, e.g. a file's write or a
+        list's append. If write_style is given, each element's style-N class
+        name is passed to it on its own, between the surrounding HTML
+        fragments, so the caller can rename it. With write_css None the style
+        names are still assigned but no CSS is rendered.
+        """
+        class_name_for = self.class_name_for
+        convert_node_to_style = self.convert_node_to_style
+        style_names = self.style_names
+        
+        stack: List[Tuple[Dict[str, Any], int, Optional[Dict[str, Any]], str]] = [
+            (root, level, parent_bbox, 'open')
+        ]
+        push = stack.append
+        pop = stack.pop
+        skipped = 0
+        while stack:
+            node, level, parent_bbox, phase = pop()
+            get = node.get
+            node_type = get('type', 'FRAME')
+            tag = _TAG_MAP.get(node_type, 'div')
+            
+            if phase == 'close':
+                write_html(f"</{tag}>\n")
+                continue
+            
+            # Prune hidden subtrees, and zero-size boxes that draw nothing: lines
+            # and other nodes with a stroke or effect still render
+            children = get('children')
+            if get('visible') is False:
+                skipped += 1
+                continue
+            bbox = get('absoluteBoundingBox')
+            if draws_nothing(node):
+                if not children or all(child.get('visible') is False for child in children):
+                    skipped += 1
+                    continue
+            
+            # Handle text content
+            content = ""
+            if node_type == 'TEXT' and 'characters' in node:
+                content = node['characters']
+            
+            # Nodes with identical declarations share one style-N class
+            class_name = class_name_for(node)
+            css = convert_node_to_style(node, parent_bbox)
+            if css:
+                signature = tuple(css.items())
+                style_name = style_names.get(signature)
+                if style_name is None:
+                    style_name = f"style-{len(style_names) + 1}"
+                    style_names[signature] = style_name
+                    if write_css is not None:
+                        write_css(css_block(style_name, css))
+                if write_style is None:
+                    write_html(f"{'  ' * level}<{tag} class=\"{class_name} {style_name}\">{content}")
+                else:
+                    write_html(f"{'  ' * level}<{tag} class=\"{class_name} ")
+                    write_style(style_name)
+                    write_html(f"\">{content}")
+            else:
+                write_html(f"{'  ' * level}<{tag} class=\"{class_name}\">{content}")
+            
+            # Handle children; they get THIS node's bbox as parent_bbox and are
+            # pushed in reverse so they pop in document order
+            if children:
+                push((node, level, parent_bbox, 'close'))
+                for child in reversed(children):
+                    push((child, level + 1, bbox, 'open'))
+            else:
+                write_html(f"</{tag}>\n")
+        
+        self.skipped_nodes += skipped
+    
+    def convert_node_to_style(self, node: Dict[str, Any],
+                              parent_bbox: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+        """Convert a Figma node to CSS properties, collected in a single dict"""
+        get = node.get
+        node_type = get('type', 'FRAME')
+        convert_color = self.convert_color
+        color_cache = self._color_cache
+
+        # Layout properties; the other sections add to the same dict
+        css = self.convert_layout(node, parent_bbox)
+
+        # Fills for background or text color
+        fills = get('fills')
+        if fills is not None:
+            fill = fills[0] if fills else None
+            if node_type == 'TEXT' and fill and fill.get('type') == 'SOLID':
+                c = fill.get('color')
+                color = c and color_cache.get((c['r'], c['g'], c['b'], c.get('a', 1)))
+                css['color'] = color or convert_color(c)
+                # Do NOT set background for text node
+            elif fill:
+                background = self.convert_fill(fills)
+                if background != 'transparent':
+                    css['background'] = background
+
+        # Text styling
+        if node_type == 'TEXT':
+            style = get('style')
+            if style is not None:
+                self.convert_text_style(style, css)
+
+        # Border
+        strokes = get('strokes')
+        if strokes:
+            stroke = strokes[0]
+            if stroke.get('type') == 'SOLID':
+                c = stroke.get('color')
+                color = c and color_cache.get((c['r'], c['g'], c['b'], c.get('a', 1)))
+                color = color or convert_color(c)
+                stroke_weight = stroke.get('strokeWeight', 1)
+                css['border'] = f"{_px(stroke_weight)} solid {color}"
+
+        # Effects (shadows, blurs, etc.); as in the cascade, the last shadow wins
+        effects = get('effects')
+        if effects is not None:
+            for effect in effects:
+                if effect.get('type') == 'DROP_SHADOW':
+                    offset = effect.get('offset', {})
+                    offset_x = offset.get('x', 0)
+                    offset_y = offset.get('y', 0)
+                    blur_radius = effect.get('radius', 0)
+                    c = effect.get('color')
+                    color = c and color_cache.get((c['r'], c['g'], c['b'], c.get('a', 1)))
+                    color = color or convert_color(c)
+                    css['box-shadow'] = f"{_px(offset_x)} {_px(offset_y)} {_px(blur_radius)} {color}"
+
+        return css